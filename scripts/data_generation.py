@@ -13,7 +13,6 @@
 ##################
 import sys, os
 import numpy as np
-import pandas as pd
 import helper_functions as hf
 
 # Confirm the correct directory; break script and prompt user to move to correct directory otherwise
@@ -26,10 +25,10 @@ if not filepath.endswith('myersBriggsNLPAnalysis'):
 	sys.exit(1)
 
 raw_data = 'data/mbti_1.csv'
-token_data = 'data/mbti_tokenized.csv'
-clean_data = 'data/mbti_cleaned.csv'
+token_data = 'data/mbti_tokenized.parquet'
+clean_data = 'data/mbti_cleaned.parquet'
 columns = np.array(['type', 'posts'])
-raw_df = pd.read_csv(raw_data, header = 0)
+raw_df = hf.read_data(raw_data)
 
 ################
 # Tokenize data 
@@ -57,11 +56,12 @@ if file_exists:
         'Would you like to generate it again? (Y/n) ')
 
 if (prompt_user == 'Y') or (not file_exists):
-    token_df = hf.parallelize(func = hf.tokenize_data, df = raw_df)
+    token_df = hf.tokenize_data_parallel(raw_df)
     print('Tokenized Data Shape:', token_df.shape)
     print('Head of Tokenized Data:', token_df.head(10))
-    # Write to csv
-    token_df.to_csv(token_data, columns = list(token_df.columns.values), index = False)
+    # Write to parquet in one go; token lists are stored as strings like the old csv output
+    token_df['posts'] = token_df['posts'].astype(str)
+    token_df.to_parquet(token_data)
 elif prompt_user == 'n':
     print('\nContinuing to clean data without stopwords.')
 else:
@@ -86,12 +86,12 @@ if file_exists:
         'Would you like to generate it again? (Y/n) ')
 
 if (prompt_user == 'Y') or (not file_exists):
-    #clean_df = hf.parallelize(func = hf.tokenize_data(raw_df, filter_stopwords = True), df = raw_df)
-    clean_df = hf.tokenize_data(raw_df, filter_stopwords = True)
+    clean_df = hf.tokenize_data_parallel(raw_df, filter_stopwords = True)
     print('Cleaned Data Shape:', clean_df.shape)
     print('Head of Cleaned Data:', clean_df.head(10))
-    # Write to csv
-    clean_df.to_csv(clean_data, columns = list(clean_df.columns.values), index = False)
+    # Write to parquet in one go; token lists are stored as strings like the old csv output
+    clean_df['posts'] = clean_df['posts'].astype(str)
+    clean_df.to_parquet(clean_data)
 elif prompt_user == 'n':
     print('\nContinuing through rest of script.')
 else:
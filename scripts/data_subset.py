@@ -15,6 +15,7 @@ import sys, os
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
+import helper_functions as hf
 
 # Confirm the correct directory; break script and prompt user to move to correct directory otherwise
 filepath = os.getcwd()
@@ -26,8 +27,8 @@ if not filepath.endswith('myersBriggsNLPAnalysis'):
 	sys.exit(1)
 
 raw_data = 'data/mbti_1.csv'
-token_data = 'data/mbti_tokenized.csv'
-clean_data = 'data/mbti_cleaned.csv'
+token_data = 'data/mbti_tokenized.parquet'
+clean_data = 'data/mbti_cleaned.parquet'
 columns = np.array(['type', 'posts'])
 
 ##################################################
@@ -56,15 +57,16 @@ if not token_file_exists or not clean_file_exists:
     sys.exit(1)
 
 # Declare different processed and unprocessed objects for further analysis
-raw_df = pd.read_csv(raw_data, header = 0)
+# The raw CSV is read through a cached Parquet copy; the processed data is already Parquet
+raw_df = hf.read_data(raw_data)
 raw_type = raw_df['type']
 raw_posts = raw_df['posts']
 
-token_df = pd.read_csv(token_data, header = 0)
+token_df = pd.read_parquet(token_data)
 token_type = token_df['type']
 token_posts = token_df['posts']
 
-clean_df = pd.read_csv(clean_data, header = 0)
+clean_df = pd.read_parquet(clean_data)
 clean_type = clean_df['type']
 clean_posts = clean_df['posts']
 
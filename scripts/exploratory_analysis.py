@@ -21,7 +21,6 @@ import matplotlib as mpl
 mpl.use('TkAgg')
 import matplotlib.pyplot as plt
 import os, sys
-import nltk
 from nltk import bigrams
 import wordcloud
 from collections import Counter
@@ -80,21 +79,29 @@ plt.savefig('images/typefrequencylabeled.png')
 
 # Frequencies of words in tokenized data
 token_words = hf.gather_words(token_posts)
-token_freq = nltk.FreqDist(token_words)
+token_freq = hf.top_words(token_words, 25)
 print('Top 25 Tokenized Words without Stopwords:\n')
-for word, frequency in token_freq.most_common(25):
+for word, frequency in token_freq.items():
 	print('%s: %d' % (word, frequency))
 
-token_freq.plot(25, title = 'Top 25 Word Frequencies', cumulative = False)
+token_freq.plot(kind = 'barh')
+plt.title('Top 25 Word Frequencies')
+plt.xlabel('Frequency')
+plt.ylabel('Word')
+plt.show()
 
 # Frequencies of words in cleaned data
 clean_words = hf.gather_words(clean_posts)
-clean_freq = nltk.FreqDist(clean_words)
+clean_freq = hf.top_words(clean_words, 25)
 print('Top 25 Tokenized Words without Stopwords:\n')
-for word, frequency in clean_freq.most_common(25):
+for word, frequency in clean_freq.items():
 	print('%s: %d' % (word, frequency))
 
-clean_freq.plot(25, title = 'Top 25 Word Frequencies No Stopwords', cumulative = False)
+clean_freq.plot(kind = 'barh')
+plt.title('Top 25 Word Frequencies No Stopwords')
+plt.xlabel('Frequency')
+plt.ylabel('Word')
+plt.show()
 
 print('''
 	---------------------------------
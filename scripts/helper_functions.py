@@ -20,9 +20,12 @@ import re, nltk, string
 from nltk.corpus import stopwords
 import wordcloud
 import os, sys
+from itertools import chain
+from functools import partial
 from multiprocessing import cpu_count, Pool
-from sklearn.model_selection import cross_val_score, GridSearchCV
+from sklearn.model_selection import cross_val_score, RandomizedSearchCV, ParameterGrid, StratifiedKFold
 from sklearn.pipeline import Pipeline
+from sklearn.base import clone
 
 
 # Confirm we are in the correct directory, otherwise break script 
@@ -41,6 +44,9 @@ if not filepath.endswith('myersBriggsNLPAnalysis'):
 
 columns = np.array(['type', 'posts'])
 
+# Directory for caching fitted pipeline steps between fits
+cache_dir = 'cache/sklearn'
+
 '''
 Specific parsing strategy from:
 https://marcobonzanini.com/2015/03/09/mining-twitter-data-with-python-part-2/
@@ -75,6 +81,16 @@ regex_str = [
 token_re = re.compile(r'('+'|'.join(regex_str)+')', re.VERBOSE | re.IGNORECASE)
 emoticon_re = re.compile(r'^' + emoticons_str + '$', re.VERBOSE | re.IGNORECASE)
 
+# Translation table deleting the brackets and quotes left over from stringified token lists
+_STRIP_TBL = str.maketrans('', '', '][\'"')
+
+# Download stopwords only if missing & build the set once, so lookups are fast
+try:
+    nltk.data.find('corpora/stopwords')
+except LookupError:
+    nltk.download('stopwords')
+STOP_SET = frozenset(stopwords.words('english')) | frozenset(string.punctuation)
+
 #########################################################
 # FUNCTIONS WE WILL BE USING/IMPORTING INTO OTHER SCRIPTS
 #########################################################
@@ -89,11 +105,7 @@ def remove_stopwords(text):
     Returns:
     - clean_words: list of words with stopwords removed
     '''
-    # Download stopwords & make list of stopwords here so we don't download every time
-    nltk.download('stopwords')
-    stop_list = stopwords.words('english') + list(string.punctuation)
-
-    clean_words = [term for term in text if term not in stop_list]
+    clean_words = [term for term in text if term not in STOP_SET]
     return clean_words
     
 def check_emoticons(tokens, lowercase = False):
@@ -110,96 +122,145 @@ def check_emoticons(tokens, lowercase = False):
         tokens = [token if emoticon_re.search(token) else token.lower() for token in tokens]
     return tokens
 
-def tokenize_data(df, filter_stopwords = False):
+def read_data(data_path):
     '''
-    Purpose: Tokenize data according to strategy coded above
+    Purpose: Read a CSV of data, caching a Parquet copy so later reads skip the CSV parsing
 
     Inputs:
-    - df: Pandas dataframe containing at least one text column to be tokenized
+    - data_path: path to the CSV file (inputted as string)
 
     Returns:
-    - token_df: Pandas dataframe with text column containing lists of tokenized strings
+    - df: Pandas dataframe with the contents of the file
+
+    NOTE: The Parquet copy is written next to the CSV and is only trusted while it is newer
+    Than the CSV, so regenerating the data also refreshes the cache
+    '''
+    parquet_path = os.path.splitext(data_path)[0] + '.parquet'
+    if os.path.isfile(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(data_path):
+        return pd.read_parquet(parquet_path)
 
-    NOTE: Here I am making a list, appending the values to the list, and turning into a dataframe
-    Rather than appending dataframes to each other every iteration as that is not as efficient
+    df = pd.read_csv(data_path, header = 0)
+    df.to_parquet(parquet_path)
+    return df
+
+def tokenize_data(df, filter_stopwords = False, lowercase = False):
     '''
-    # Create empty list for results and conversion to DataFrame later
-    token_list = []
+    Purpose: Tokenize data according to strategy coded above
 
-    for idx, row in df.iterrows():
+    Inputs:
+    - df: Pandas dataframe containing at least one text column to be tokenized
+    - filter_stopwords: boolean to remove stopwords and punctuation if true
+    - lowercase: boolean to lowercase every token that is not an emoticon if true
 
-        # Split tweets into individual tweets
-        tweets_split = row['posts'].split('|||')
+    Returns:
+    - token_df: Pandas dataframe with text column containing lists of tokenized strings
 
-        # Grab personality type since we're analyzing one row of data at a time
-        #ptype = pd.Series(row['type'], name = 'type')
-        ptype = row['type']
+    NOTE: The tweets are flattened into one long Series and tokenized with pandas string methods
+    Rather than looping over rows with iterrows, as that is not as efficient
+    '''
+    # Split every user's row into individual tweets, repeating the type for each tweet
+    tweets = df['posts'].str.split(r'\|\|\|')
+    ptypes = df['type'].repeat(tweets.str.len().values).values
+    tweets = pd.Series(list(chain.from_iterable(tweets)), dtype = object)
 
-        # Iterate through list of tweets for each user
-        for tweet in tweets_split:
+    # Tokenize the whole column in one pass rather than row by row
+    tokenized_tweets = tweets.str.findall(token_re).tolist()
 
-            # Tokenize data
-            tokenized_tweets = [token for token in token_re.findall(tweet)]
+    # Check for emoticons so we don't lowercase them
+    tokenized_tweets = [check_emoticons(tokens, lowercase) for tokens in tokenized_tweets]
 
-            # Check for emoticons so we don't lowercase them
-            tokenized_tweets = check_emoticons(tokenized_tweets)
+    # Remove stopwords if declared
+    if filter_stopwords:
+        tokenized_tweets = [remove_stopwords(tokens) for tokens in tokenized_tweets]
 
-            # Remove stopwords if declared
-            if filter_stopwords:
+    token_df = pd.DataFrame({'type': ptypes, 'posts': tokenized_tweets}, columns = columns, dtype = object)
+    return token_df
 
-                tokenized_tweets = remove_stopwords(tokenized_tweets)
+def tokenize_data_parallel(df, filter_stopwords = False, lowercase = False):
+    '''
+    Purpose: Tokenize data across all CPU cores, splitting the rows between processes
 
-            # Append to list
-            token_list.append([ptype, tokenized_tweets])
+    Inputs:
+    - df: Pandas dataframe containing at least one text column to be tokenized
+    - filter_stopwords: boolean to remove stopwords and punctuation if true
+    - lowercase: boolean to lowercase every token that is not an emoticon if true
 
-        # Print progress, as this step takes a while
-        if idx % 100 == 0:
-            print('Row %s of %s done' % (idx, df.shape[0]))
+    Returns:
+    - token_df: Pandas dataframe with text column containing lists of tokenized strings
 
-    token_df = pd.DataFrame(token_list, columns = columns, dtype = object)
+    NOTE: The compiled regexes and STOP_SET live at module level, so worker processes
+    Get them by importing this script rather than having them pickled for every chunk
+    '''
+    tokenize_chunk = partial(tokenize_data, filter_stopwords = filter_stopwords, lowercase = lowercase)
+    token_df = parallelize(tokenize_chunk, df).reset_index(drop = True)
     return token_df
 
-def build_pipeline(vectorizer, tfidf, kbest, model):
+def build_pipeline(vectorizer, tfidf, kbest, model, memory = cache_dir):
     '''
     Purpose: Combine different parts of a machine learning model together
     
     Inputs:
-    - vectorizer: count vectorizer object to handle n-gram instances
+    - vectorizer: count or hashing vectorizer object to handle n-gram instances
     - tfidf: Term Frequency Inverse Document Frequency object (common NLP technique)
     - chi2: feature selection object using chi-squared analysis
     - clf: machine learning classifier object (scikit-learn)
+    - memory: directory where joblib caches the fitted vectorizer, tfidf and chi2 steps (None to disable)
 
     Returns:
     - text_clf: a machine learning classifier object for training and evaluation
+
+    NOTE: With the cache, refitting on the same data and settings (i.e. across grid search
+    Candidates or reruns of a script) loads the fitted steps from disk instead of refitting them
     '''
     text_clf = Pipeline([
         ('vect', vectorizer),
         ('tfidf', tfidf),
         ('chi2', kbest),
         ('clf', model),
-    ])
+    ], memory = memory)
 
     return text_clf
 
-def grid_search(clf, parameters, jobs, X, y):  
+def feature_pipeline(text_clf):
     '''
-    Purpose: Run parameter tuning in parallel
+    Purpose: Take the feature extraction steps of a fitted pipeline, leaving out the classifier
 
     Inputs:
-    - clf: machine learning classifier object (scikit-learn)
+    - text_clf: fitted pipeline whose last step is the classifier (i.e. made by 'build_pipeline')
+
+    Returns:
+    - features: pipeline of the already fitted steps before the classifier
+
+    NOTE: Transforming the training data with this once and cross validating only the classifier
+    Avoids redoing the vectorizing, tfidf weighting and chi2 scoring for every fold
+    '''
+    features = Pipeline(text_clf.steps[:-1])
+    return features
+
+def grid_search(clf, parameters, jobs, X, y, iterations = 10):  
+    '''
+    Purpose: Run parameter tuning in parallel, sampling a fixed number of parameter settings
+
+    Inputs:
+    - clf: pipeline made by 'build_pipeline'
     - parameters: grid of parameters and possible values to choose from
     - jobs: number of CPUs to utilize on machine (use -1 for all CPUs)
     - X: attributes of data
     - y: response variable of data
+    - iterations: number of parameter settings to try out of the grid (capped at the grid size)
     '''
-    gs_clf = GridSearchCV(clf, 
-    param_grid = parameters, 
+    # Never sample more settings than the grid holds, which RandomizedSearchCV rejects
+    iterations = min(iterations, len(ParameterGrid(parameters)))
+    gs_clf = RandomizedSearchCV(clf, 
+    param_distributions = parameters, 
+    n_iter = iterations,
     n_jobs = jobs,
+    random_state = 42,
     verbose = 7
     )
     gs_clf = gs_clf.fit(X, y)
 
-    best_parameters, score, _ = max(gs_clf.grid_scores_, key = lambda x: x[1])
+    best_parameters, score = gs_clf.best_params_, gs_clf.best_score_
     for param_name in sorted(parameters.keys()):
         print("%s: %r" % (param_name, best_parameters[param_name]))
     print(score)
@@ -214,24 +275,35 @@ def gather_words(posts):
     - posts: tokenized string data
 
     Returns:
-    - words: list of words without brackets
-    '''
-    words = []
-    for tweet in posts:
-        # Split tweet into words by comma
-        # Or else iterator splits by letter, not word
-        tweet_words = tweet.split(',')
-        for word in tweet_words:
-            # Remove brackets at end of tweet and quotes
-            word = re.sub(r']', '', word)
-            word = re.sub(r'\'', '', word)
-            word = re.sub(r'\"', '', word)
-            word = re.sub(r'\[', '', word)
-            word = word.strip()
-            words.append(word)
+    - words: pandas Series of words without brackets
+    '''
+    # Split every tweet by comma and flatten into one Series
+    # Or else iterator splits by letter, not word
+    tweet_words = pd.Series(posts, dtype = object).str.split(',')
+    words = pd.Series(list(chain.from_iterable(tweet_words)), dtype = object)
+
+    # Remove brackets at end of tweet and quotes
+    words = words.str.translate(_STRIP_TBL).str.strip()
 
     return words
 
+def top_words(words, n = 25):
+    '''
+    Purpose: Count words and keep the most frequent ones
+
+    Inputs:
+    - words: words to count (from 'gather_words' function)
+    - n: number of most frequent words to keep
+
+    Returns:
+    - top_freq: pandas Series of counts indexed by word, most frequent first
+
+    NOTE: value_counts counts with a hash table in C, in one pass over the words
+    '''
+    top_freq = pd.Series(words).value_counts().head(n)
+
+    return top_freq
+
 def plot_wordcloud(posts, save_image = False):
     '''
     Purpose: Given a column of words, gather them and plot a wordcloud
@@ -278,7 +350,99 @@ def cross_val(clf, X_train, y_train):
     - X_train: training set of attributes for data
     - y_train: training set of responses for data
     '''
-    scores = cross_val_score(clf, X_train, y_train, cv = 5)
+    scores = cross_val_score(clf, X_train, y_train, cv = 5, n_jobs = -1)
+    print(scores)
+    print("Accuracy: %0.2f (+/- %0.2f)" % (scores.mean(), scores.std() * 2))
+
+def fit_in_batches(vectorizer, clf, X, y, classes, epochs, batches):
+    '''
+    Purpose: Train a classifier with partial_fit on mini-batches of hashed text
+
+    Inputs:
+    - vectorizer: stateless vectorizer object (i.e. HashingVectorizer)
+    - clf: machine learning classifier object supporting partial_fit (scikit-learn)
+    - X: attributes of data
+    - y: response variable of data
+    - classes: every label the classifier should know about
+    - epochs: number of passes over the data
+    - batches: number of mini-batches to split the data into
+
+    Returns:
+    - clf: the trained classifier
+
+    NOTE: Only one batch of features is held in memory at a time
+    '''
+    X, y = np.asarray(X), np.asarray(y)
+    for epoch in range(epochs):
+        for X_batch, y_batch in zip(np.array_split(X, batches), np.array_split(y, batches)):
+            clf.partial_fit(vectorizer.transform(X_batch), y_batch, classes = classes)
+        print('Epoch %s of %s done' % (epoch + 1, epochs))
+
+    return clf
+
+def predict_in_batches(vectorizer, clf, X, batches):
+    '''
+    Purpose: Make predictions on mini-batches of hashed text
+
+    Inputs:
+    - vectorizer: stateless vectorizer object (i.e. HashingVectorizer)
+    - clf: trained machine learning classifier object (scikit-learn)
+    - X: attributes of data
+    - batches: number of mini-batches to split the data into
+
+    Returns:
+    - predictions: array of predicted labels
+    '''
+    predictions = [clf.predict(vectorizer.transform(X_batch))
+        for X_batch in np.array_split(np.asarray(X), batches)]
+
+    return np.concatenate(predictions)
+
+def _score_fold(fold, vectorizer, clf, classes, epochs, batches):
+    '''
+    Purpose: Train a fresh copy of a classifier on one cross validation fold and score it
+
+    Inputs:
+    - fold: tuple of the fold's training attributes, training responses, held out attributes and held out responses
+    - vectorizer, clf, classes, epochs, batches: as in 'fit_in_batches'
+
+    Returns:
+    - score: accuracy on the held out part of the fold
+    '''
+    X_fit, y_fit, X_held, y_held = fold
+    fold_clf = fit_in_batches(vectorizer, clone(clf), X_fit, y_fit, classes, epochs, batches)
+    predicted = predict_in_batches(vectorizer, fold_clf, X_held, batches)
+    score = np.mean(predicted == y_held)
+
+    return score
+
+def cross_val_batches(vectorizer, clf, X_train, y_train, classes, epochs, batches):
+    '''
+    Purpose: Compute cross validation score of a classifier trained with 'fit_in_batches'
+
+    Inputs:
+    - vectorizer: stateless vectorizer object (i.e. HashingVectorizer)
+    - clf: machine learning classifier object supporting partial_fit (scikit-learn)
+    - X_train: training set of attributes for data
+    - y_train: training set of responses for data
+    - classes: every label the classifier should know about
+    - epochs: number of passes over the data
+    - batches: number of mini-batches to split the data into
+
+    NOTE: Folds are trained in parallel, one process per fold (up to the number of CPUs)
+    So memory stays at one batch of features per process
+    '''
+    X_train, y_train = np.asarray(X_train), np.asarray(y_train)
+    folds = [(X_train[train_idx], y_train[train_idx], X_train[test_idx], y_train[test_idx])
+        for train_idx, test_idx in StratifiedKFold(n_splits = 5).split(X_train, y_train)]
+
+    score_fold = partial(_score_fold, vectorizer = vectorizer, clf = clf, classes = classes,
+        epochs = epochs, batches = batches)
+    pool = Pool(min(len(folds), cpu_count()))
+    scores = np.array(pool.map(score_fold, folds))
+    pool.close()
+    pool.join()
+
     print(scores)
     print("Accuracy: %0.2f (+/- %0.2f)" % (scores.mean(), scores.std() * 2))
 
@@ -15,14 +15,14 @@ import numpy as np
 import pandas as pd
 import helper_functions as hf
 from data_subset import clean_df, clean_type, clean_posts
-from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from sklearn.feature_selection import SelectKBest, chi2 
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import SGDClassifier
 
 # Linear Support Vector Machine parameters for tuning
+# The hashed feature space is fixed, so n-gram range is not part of the grid
 parameters_svm = {
-    'vect__ngram_range': [(1, 1), (1, 2)],
     'tfidf__use_idf': (True, False),
     'clf__alpha': (1e-2, 1e-3),
     'clf__penalty': ['l2', 'l1', 'elasticnet'],
@@ -38,7 +38,8 @@ X_train, X_test, y_train, y_test = train_test_split(clean_posts,
 # Linear Support Vector Machine w/ stochastic gradient descent (SGD) learning
 # This model can be other linear models, but using "hinge" makes it a SVM
 # Build Pipeline again
-text_clf_svm = hf.build_pipeline(CountVectorizer(ngram_range = (1, 1)),
+text_clf_svm = hf.build_pipeline(
+    HashingVectorizer(ngram_range = (1, 1), n_features = 2 ** 18, alternate_sign = False, norm = None),
     TfidfTransformer(use_idf = True),
     SelectKBest(chi2, k = 'all'),
     SGDClassifier(
@@ -75,7 +76,11 @@ print(test_crosstb_nb)
 hf.scatter_plot(list(counts), list(rates.values())) 
 
 # Cross Validation
-cross_val(text_clf_svm, mbtiposts, mbtitype)
+# Reuse the fitted feature steps to transform the training posts once
+# So only the classifier is refit on each fold
+features_svm = hf.feature_pipeline(text_clf_svm)
+X_features = features_svm.transform(X_train)
+hf.cross_val(text_clf_svm.named_steps['clf'], X_features, y_train)
 
 # Do a Grid Search to test multiple parameter values
-#grid_search(text_clf_svm, parameters_svm, n_jobs = 1, X_train, y_train)
+#hf.grid_search(text_clf_svm, parameters_svm, -1, X_train, y_train)
@@ -15,17 +15,17 @@ import numpy as np
 import pandas as pd
 import helper_functions as hf
 from data_subset import clean_df, clean_type, clean_posts
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
+from sklearn.naive_bayes import ComplementNB
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
 from sklearn.feature_selection import SelectKBest, chi2 
 from sklearn.model_selection import train_test_split
 
 # Naive Bayes parameters used for tuning
+# The hashed feature space is fixed, so n-gram range is not part of the grid
 parameters_nb = {
-	'vect__ngram_range': [(1, 1), (1, 2)],
-	'tdidf__use_idf': (True, False),
+	'tfidf__use_idf': (True, False),
 	'clf__fit_prior': (True, False),
-	'clf__alpha:' (1.0e-10, 1.0e-5, 1.0e-2)
+	'clf__alpha': (1.0e-10, 1.0e-5, 1.0e-2)
 }
 
 # Split data into training and testing sets
@@ -33,12 +33,13 @@ X_train, X_test, y_train, y_test = train_test_split(clean_posts,
 	clean_type, test_size = 0.33, random_state = 42)
 
 # Naive Bayes model fitting and predictions
+# Complement Naive Bayes handles the uneven personality type counts better than Multinomial
 # Building a Pipeline; this does all of the work putting everything together   
 text_clf_nb = hf.build_pipeline(
-	CountVectorizer(ngram_range = (1, 1)),
+	HashingVectorizer(ngram_range = (1, 1), n_features = 2 ** 18, alternate_sign = False, norm = None),
     TfidfTransformer(use_idf = False),
     SelectKBest(chi2, k = 'all'),
-    MultinomialNB(fit_prior = False, alpha = 1.0e-10)
+    ComplementNB(fit_prior = False, alpha = 1.0e-10)
 )
 
 text_clf_nb = text_clf_nb.fit(X_train, y_train)
@@ -63,7 +64,12 @@ print(test_crosstb_nb)
 hf.scatter_plot(list(counts), list(rates.values())) 
 
 # Cross Validation
-cross_val(text_clf_nb, mbtiposts, mbtitype)
+# Reuse the fitted feature steps to transform the training posts once
+# So only the classifier is refit on each fold
+features_nb = hf.feature_pipeline(text_clf_nb)
+X_features = features_nb.transform(X_train)
+hf.cross_val(text_clf_nb.named_steps['clf'], X_features, y_train)
 
 # Do a Grid Search to test multiple parameter values
-#grid_search(text_clf_nb, parameters_nb, n_jobs = 1, X_train, y_train)
+# Half of the 12 settings in the grid are sampled
+#hf.grid_search(text_clf_nb, parameters_nb, -1, X_train, y_train, iterations = 6)
@@ -15,16 +15,14 @@ import numpy as np
 import pandas as pd
 import helper_functions as hf
 from data_subset import clean_df, clean_type, clean_posts
-from sklearn.feature_extraction.text import CountVectorizer, TfidfTransformer
-from sklearn.feature_selection import SelectKBest, chi2
+from sklearn.feature_extraction.text import HashingVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPClassifier
 
 
 # Neural Network parameters for tuning
+# The hashed feature space is fixed, so n-gram range is not part of the grid
 parameters_nn = {
-    'vect__ngram_range': [(1, 1), (1, 2)],
-    'tfidf__use_idf': (True, False),
     'clf__learning_rate_init': (1e-1, 5e-1),
     'clf__hidden_layer_sizes': (50, 100),
     'clf__activation': ['identity', 'tanh', 'relu']
@@ -35,27 +33,31 @@ X_train, X_test, y_train, y_test = train_test_split(clean_posts,
     clean_type, test_size = 0.33, random_state = 42)
 
 # NEURAL NETWORK
-text_clf_nn = hf.build_pipeline(CountVectorizer(),
-    TfidfTransformer(),
-    SelectKBest(chi2, k = 'all'),
-    MLPClassifier(
-        hidden_layer_sizes=(50,), 
-        activation = 'identity',
-        max_iter=50, 
-        alpha=1e-4,
-        solver='sgd', 
-        verbose=10, 
-        tol=1e-4, 
-        random_state=1,
-        learning_rate_init=.1)
-)
+# Posts are hashed and fed to the network in mini-batches with partial_fit
+# So only one batch of features is in memory at a time, when training, predicting and cross validating
+# Single precision features halve the memory of each batch
+epochs = 50
+batches = 32
+vect_nn = HashingVectorizer(n_features = 2 ** 18, alternate_sign = False, dtype = np.float32)
+# max_iter and tol are ignored by partial_fit; they only cap the fit calls of the grid search below
+clf_nn = MLPClassifier(
+    hidden_layer_sizes=(50,), 
+    activation = 'identity',
+    max_iter=epochs, 
+    alpha=1e-4,
+    solver='sgd', 
+    tol=1e-4, 
+    random_state=1,
+    learning_rate_init=.1)
 
-text_clf_nn.fit(X_train, y_train)
+all_types = np.unique(clean_type)
+clf_nn = hf.fit_in_batches(vect_nn, clf_nn, X_train, y_train, all_types, epochs, batches)
 
 # Evaluate performance on test set
-predicted_nn = text_clf_nn.predict(X_test)
-print("Training set score: %f" % text_clf_nn.score(X_train, y_train))
-print("Test set score: %f" % text_clf_nn.score(X_test, y_test))
+predicted_nn = hf.predict_in_batches(vect_nn, clf_nn, X_test, batches)
+predicted_train_nn = hf.predict_in_batches(vect_nn, clf_nn, X_train, batches)
+print("Training set score: %f" % np.mean(predicted_train_nn == y_train))
+print("Test set score: %f" % np.mean(predicted_nn == y_test))
 print("Number of mislabeled points out of a total %d points for the Linear SVM algorithm: %d"
     % (X_test.shape[0],(y_test != predicted_nn).sum()))
 
@@ -71,7 +73,12 @@ print(test_crosstb_nb)
 hf.scatter_plot(list(counts), list(rates.values())) 
 
 # Cross Validation Score
-cross_val(text_clf_nn, mbtiposts, mbtitype)
+# Each fold is trained the same way as the model above, with the folds running in parallel
+hf.cross_val_batches(vect_nn, clf_nn, X_train, y_train, all_types, epochs, batches)
 
 # Do a Grid Search to test multiple parameter values
-#grid_search(text_clf_nn, parameters_nn, n_jobs = 1, X_train, y_train)
+# The grid search refits the chained vectorizer and network in memory with fit, not in batches
+# Half of the 12 settings in the grid are sampled
+#from sklearn.pipeline import Pipeline
+#text_clf_nn = Pipeline([('vect', vect_nn), ('clf', clf_nn)])
+#hf.grid_search(text_clf_nn, parameters_nn, -1, X_train, y_train, iterations = 6)